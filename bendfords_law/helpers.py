@@ -1,4 +1,6 @@
-from collections import Counter
+import hashlib
+import math
+from collections import OrderedDict
 from functools import lru_cache
 from typing import List, Optional, Tuple
 
@@ -6,6 +8,23 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+try:
+    import numba
+except ImportError:  # numba is optional, NumPy is used whenever it isn't installed
+    numba = None
+
+# first digit probabilities predicted by Bendford's law, for the digits 1 through 9
+_BENFORD_1D = np.log10(1.0 + 1.0 / np.arange(1, 10))
+_BENFORD_1D.setflags(write=False)
+
+# every power of 10 representable as an int64, indexed by exponent
+_POW10 = 10 ** np.arange(19, dtype=np.int64)
+_POW10.setflags(write=False)
+
+# every power of 10 representable as an uint64, indexed by exponent
+_POW10_UINT64 = 10 ** np.arange(20, dtype=np.uint64)
+_POW10_UINT64.setflags(write=False)
+
 
 def int_to_digits(integer: int) -> List[int]:
     """Given an integer, breaks it down into it's individual digits.
@@ -27,14 +46,34 @@ def get_digits(number: int, indices: List[int]) -> List[int]:
         number (int): number to get digit from.
         indices (List[int]): indices of digits to extract.
 
+    Raises:
+        ValueError: if number is not a non-negative integer.
+        IndexError: if number has no digit at one of the indices.
+
     Returns:
         List[int]: extracted digit
     """
     if not isinstance(number, (int, np.integer)):
         raise ValueError(f"Number must be an integer, but found type {type(number)}.")
 
-    digits = int_to_digits(number)
-    return [digits[index] for index in indices]
+    number = int(number)
+    if number < 0:
+        raise ValueError("Number cannot be negative.")
+
+    n_digits = 1 if number == 0 else int(math.log10(number)) + 1
+    # log10 is inexact for large integers, so the digit count may be off by one in either direction
+    if n_digits > 1 and number < 10 ** (n_digits - 1):
+        n_digits -= 1
+    elif number >= 10**n_digits:
+        n_digits += 1
+
+    normalized_indices = [index + n_digits if index < 0 else index for index in indices]
+    if any(not 0 <= index < n_digits for index in normalized_indices):
+        raise IndexError(f"Number {number} only has {n_digits} digits.")
+
+    return [
+        (number // 10 ** (n_digits - 1 - index)) % 10 for index in normalized_indices
+    ]
 
 
 def bendford_dist(digits: np.ndarray) -> np.ndarray:
@@ -46,25 +85,15 @@ def bendford_dist(digits: np.ndarray) -> np.ndarray:
     Returns:
         np.ndarray: distribution of digit occurrence.
     """
-
-    def log_n(x: np.ndarray, n: int = 10) -> np.ndarray:
-        """Computes log of base n using the base switching property.
-
-        Args:
-            x (np.ndarray): array of numbers
-            n (int, optional): base. Defaults to 10.
-
-        Returns:
-            np.ndarray: log base 10 of specified values.
-        """
-        return np.log(x) / np.log(n)
-
-    return log_n(1 + (1 / digits))
+    return np.log10(1.0 + 1.0 / np.asarray(digits, dtype=np.float64))
 
 
+@lru_cache(maxsize=16)
 def bendford_dist_(order: int) -> np.ndarray:
     """Returns distribution of digit co-occurrences as predicted by Bendford's law
 
+    Results are cached per order and shared between callers, so the returned array is read-only.
+
     Args:
         order (int): order of Bendford's law. Setting order to 1 is equivalent to the single digit Bendford's law.
 
@@ -79,14 +108,17 @@ def bendford_dist_(order: int) -> np.ndarray:
         raise ValueError("Order cannot be less than 1.")
 
     digit_combinations = np.arange(np.power(10, order - 1), np.power(10, order))
-    return np.log10(1 + 1 / digit_combinations)
+    distribution = np.log10(1 + 1 / digit_combinations)
+    distribution.setflags(write=False)
+    return distribution
 
 
-# cache results for faster performance
-@lru_cache(None)
 def fib_number(n: int) -> int:
     """Returns number at specific location in Fibonacci sequence.
 
+    Uses fast doubling without recursion, so only O(log n) big integer multiplications are needed and
+    arbitrarily large n is supported without hitting Python's recursion limit.
+
     Args:
         n (int): index of desired number in Fibonacci sequence.
 
@@ -100,26 +132,152 @@ def fib_number(n: int) -> int:
     if n < 0:
         raise ValueError("N cannot be less than 0.")
 
-    if n < 2:
-        return n
-    return fib_number(n - 1) + fib_number(n - 2)
+    # fast doubling, walking the bits of n from the most significant one, with (a, b) = (F(k), F(k + 1))
+    a, b = 0, 1
+    for i_bit in range(int(n).bit_length() - 1, -1, -1):
+        a, b = a * (2 * b - a), a * a + b * b  # F(2k), F(2k + 1)
+        if (n >> i_bit) & 1:
+            a, b = b, a + b
+    return a
+
+
+# F(0) through F(93) all fit in an uint64
+_MAX_UINT64_FIB_ELEMENTS = 94
 
 
 def fib_sequence(n_elements: int = 100) -> np.ndarray:
     """Returns the first n numbers in a Fibonacci sequence.
 
+    Sequences of up to 94 elements are stored as uint64, since F(93) ~ 1.2e19 is the largest Fibonacci number
+    below 2^64. Longer sequences are stored as Python integers (object dtype), so that numbers past F(93)
+    remain exact.
+
     Args:
         n_elements (int, optional): number of elements of Fibonacci sequence. Defaults to 100.
 
     Returns:
         np.ndarray: first n_elements digits of the Fibonacci sequence
     """
-    sequence = np.zeros(n_elements)
+    dtype = np.uint64 if n_elements <= _MAX_UINT64_FIB_ELEMENTS else object
+    sequence = np.empty(n_elements, dtype=dtype)
+    a, b = 0, 1
     for i_element in range(n_elements):
-        sequence[i_element] = fib_number(i_element)
+        sequence[i_element] = a
+        a, b = b, a + b
     return sequence
 
 
+def _as_fixed_width_int(sequence: np.ndarray) -> Optional[np.ndarray]:
+    """Validates a sequence of numbers, converting it to a fixed width integer array if it can be represented
+    exactly as one. Numbers are converted to int64, except for uint64 arrays with numbers too large for int64,
+    which are kept as they are.
+
+    Args:
+        sequence (np.ndarray): sequence of numbers.
+
+    Raises:
+        ValueError: if the sequence is not made up of non-negative integers.
+
+    Returns:
+        Optional[np.ndarray]: int64 or uint64 array, or None for object arrays with integers too large for int64.
+    """
+    values = np.asarray(sequence)
+    if values.dtype == object:
+        for number in values.flat:
+            if not isinstance(number, (int, np.integer)):
+                raise ValueError(
+                    f"Sequence must contain integers, but found type {type(number)}."
+                )
+            if number < 0:
+                raise ValueError("Sequence cannot contain negative numbers.")
+        try:
+            return values.astype(np.int64)
+        except OverflowError:
+            return None
+    if not values.size:
+        return values.astype(np.int64)
+    if not np.issubdtype(values.dtype, np.integer):
+        raise ValueError(
+            f"Sequence must contain integers, but found dtype {values.dtype}."
+        )
+    if values.min() < 0:
+        raise ValueError("Sequence cannot contain negative numbers.")
+    if values.max() > np.iinfo(np.int64).max:
+        # only possible for uint64, which can still be handled without falling back to Python integers
+        return values
+    return values.astype(np.int64, copy=False)
+
+
+def nth_leading_digit(sequence: np.ndarray, k: int = 0) -> np.ndarray:
+    """Returns the digit located at index k, counting from the most significant digit, of every number in the
+    sequence. Negative indices count from the least significant digit, as with list indexing.
+
+    Args:
+        sequence (np.ndarray): sequence of non-negative integers that fit in int64 or uint64.
+        k (int, optional): index of digit to extract. Defaults to 0.
+
+    Raises:
+        ValueError: if the sequence is not made up of non-negative integers that fit in int64 or uint64, or
+            contains numbers with no digit at index k.
+
+    Returns:
+        np.ndarray: extracted digits, as int64
+    """
+    seq = _as_fixed_width_int(sequence)
+    if seq is None:
+        raise ValueError("Sequence must contain integers that fit in int64 or uint64.")
+    # dividing int64 by uint64 would go through float64, so powers of 10 must match the sequence dtype
+    pow10 = _POW10_UINT64 if seq.dtype == np.uint64 else _POW10
+
+    # log10 is undefined at zero, so zeros take the order of magnitude of single digit numbers
+    magnitude = np.maximum(seq, 1)
+    # truncation is a floor here, since every magnitude is at least 1
+    oom = np.log10(magnitude.astype(np.float64)).astype(np.int64)
+    # float rounding can push numbers just below a power of 10 up an order of magnitude
+    oom -= magnitude < pow10[oom]
+    if k < 0:
+        # the digit at index k is at the same place value in every number that has one
+        if -k > pow10.size or (oom.size and oom.min() < -k - 1):
+            raise ValueError(f"Not every number has a digit at index {k}.")
+        digits = (seq // pow10[-k - 1]) % 10
+    else:
+        oom -= k
+        if oom.size and oom.min() < 0:
+            raise ValueError(f"Not every number has a digit at index {k}.")
+        digits = (seq // pow10[oom]) % 10
+    return digits.astype(np.int64, copy=False)
+
+
+if numba is not None:
+
+    # compiled on first call (and cached to disk), so the first call in a fresh environment is slow
+    @numba.njit(parallel=True, cache=True)
+    def _leading_digit_counts(sequence: np.ndarray, n_chunks: int) -> np.ndarray:
+        """Counts how many times each digit occurs as the leading digit of the numbers in the sequence.
+
+        Args:
+            sequence (np.ndarray): int64 array of non-negative integers.
+            n_chunks (int): number of chunks to split the sequence into, one per thread.
+
+        Returns:
+            np.ndarray: array of 10 counts, one per digit.
+        """
+        chunk_size = (sequence.size + n_chunks - 1) // n_chunks
+        chunk_counts = np.zeros((n_chunks, 10), dtype=np.int64)
+        # every thread tallies its own chunk, chunks are reduced once at the end
+        for i_chunk in numba.prange(n_chunks):
+            stop = min((i_chunk + 1) * chunk_size, sequence.size)
+            for i_number in range(i_chunk * chunk_size, stop):
+                number = sequence[i_number]
+                while number >= 10:
+                    number //= 10
+                chunk_counts[i_chunk, number] += 1
+        return chunk_counts.sum(axis=0)
+
+else:
+    _leading_digit_counts = None
+
+
 def digit_occurrences(
     sequence: np.ndarray, digit_index: int = 0, exclude_zero: bool = True
 ) -> Tuple[np.ndarray, np.ndarray]:
@@ -132,22 +290,111 @@ def digit_occurrences(
         exclude_zero (bool, optional): whether to include 0 as a valid digit or not.
 
     Returns:
-        Tuple[np.ndarray, np.ndarray]: array of unique digits and array of counts of occurrences
+        Tuple[np.ndarray, np.ndarray]: array of digits and array of counts of occurrences of each digit
     """
-    # slice off first digit of integer
-    first_digits_list: List[int] = [
-        get_digits(number, [digit_index])[0] for number in sequence
-    ]
-    digit_counter = Counter(first_digits_list)
+    seq = _as_fixed_width_int(sequence)
+    if seq is None:
+        # Python integers too large for int64, digits are extracted number by number
+        try:
+            first_digits = np.array(
+                [int(str(number)[digit_index]) for number in sequence],
+                dtype=np.int64,
+            )
+        except IndexError as error:
+            raise ValueError(
+                f"Not every number has a digit at index {digit_index}."
+            ) from error
+        digit_counts = np.bincount(first_digits, minlength=10)
+    elif (
+        digit_index == 0 and seq.dtype == np.int64 and _leading_digit_counts is not None
+    ):
+        digit_counts = _leading_digit_counts(seq, numba.get_num_threads())
+    else:
+        digit_counts = np.bincount(nth_leading_digit(seq, digit_index), minlength=10)
+    digit_counts = digit_counts.astype(np.int64, copy=False)
     if exclude_zero:
-        digit_counter.pop(0, None)  # zero might not be a valid leading digit
+        # zero might not be a valid leading digit
+        return np.arange(1, 10, dtype=np.int64), digit_counts[1:]
+    return np.arange(10, dtype=np.int64), digit_counts
+
+
+def _benford_pipeline(
+    sequence: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, int, np.ndarray, np.ndarray]:
+    """Computes everything needed to compare the first digits of a sequence against Bendford's law in one pass.
+
+    Args:
+        sequence (np.ndarray): sequence of numbers to use as pool for counting digit occurrences.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, int, np.ndarray, np.ndarray]: digits, counts of occurrences of each digit,
+            total count, probabilities according to Bendford's law and observed probabilities
+    """
+    digits, occurrences = digit_occurrences(sequence)
+    total = int(occurrences.sum())
+    # expected and observed distributions, written into one buffer to avoid temporaries
+    distributions = np.empty((2, digits.size))
+    distributions[0] = _BENFORD_1D
+    np.divide(occurrences, total, out=distributions[1])
+    return digits, occurrences, total, distributions[0], distributions[1]
 
-    sorted_pairs = sorted(list(digit_counter.items()), key=lambda tup: tup[0])
-    digit_occurrence_array = np.array(sorted_pairs)
 
-    digits = digit_occurrence_array[:, 0]
-    occurrences = digit_occurrence_array[:, 1]
-    return digits, occurrences
+# most recent _benford_pipeline results, keyed by the content of the sequence they were computed from
+_PIPELINE_CACHE: "OrderedDict[Tuple[str, Tuple[int, ...], str], Tuple]" = OrderedDict()
+_PIPELINE_CACHE_SIZE = 32
+
+
+def _sequence_key(sequence: np.ndarray) -> Optional[Tuple[str, Tuple[int, ...], str]]:
+    """Returns a key identifying a sequence by its content.
+
+    Args:
+        sequence (np.ndarray): sequence of numbers.
+
+    Returns:
+        Optional[Tuple[str, Tuple[int, ...], str]]: dtype, shape and hash of the data, or None for object arrays,
+            whose raw bytes are pointers rather than content.
+    """
+    if sequence.dtype == object:
+        return None
+    data = np.ascontiguousarray(sequence).reshape(-1).view(np.uint8)
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return sequence.dtype.str, sequence.shape, digest
+
+
+def _cached_benford_pipeline(
+    sequence: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, int, np.ndarray, np.ndarray]:
+    """Same as _benford_pipeline, but reuses results for sequences with the same content, so that
+    re-rendering a figure with different styling doesn't recount digits. Cached arrays are read-only.
+
+    Hashing the sequence costs about as much as recounting its digits with the Numba kernel, so the cache is
+    only consulted when the kernel isn't available.
+
+    Args:
+        sequence (np.ndarray): sequence of numbers to use as pool for counting digit occurrences.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, int, np.ndarray, np.ndarray]: digits, counts of occurrences of each digit,
+            total count, probabilities according to Bendford's law and observed probabilities
+    """
+    values = np.asarray(sequence)
+    key = None if _leading_digit_counts is not None else _sequence_key(values)
+    if key is None:
+        return _benford_pipeline(values)
+
+    result = _PIPELINE_CACHE.get(key)
+    if result is not None:
+        _PIPELINE_CACHE.move_to_end(key)
+        return result
+
+    result = _benford_pipeline(values)
+    for item in result:
+        if isinstance(item, np.ndarray):
+            item.setflags(write=False)
+    _PIPELINE_CACHE[key] = result
+    if len(_PIPELINE_CACHE) > _PIPELINE_CACHE_SIZE:
+        _PIPELINE_CACHE.popitem(last=False)
+    return result
 
 
 # source https://gist.github.com/schlerp/5e4453b9a52deb5f600495d33eec407d
@@ -194,11 +441,26 @@ def plot_oom_dist(
     Returns:
         go.Figure: figure with distribution
     """
-    oom = np.floor(np.log10(sequence + delta))
+    sequence = np.asarray(sequence)
+    if (
+        np.issubdtype(sequence.dtype, np.integer)
+        and sequence.size
+        and sequence.min() >= 1
+    ):
+        # no risk of taking the log of zero, so the input doesn't need to be shifted by delta
+        oom = np.log10(sequence)
+    else:
+        oom = np.log10(sequence.astype(np.float64) + delta)
+    np.floor(oom, out=oom)
+    # bin on the Python side, so only one count per order of magnitude is sent to the figure
+    orders, counts = np.unique(
+        oom[np.isfinite(oom)].astype(np.int64), return_counts=True
+    )
     figure = go.Figure()
-    figure.add_trace(go.Histogram(x=oom))
+    figure.add_trace(go.Bar(x=orders, y=counts))
     figure.update_layout(
         title=_format_title(title, legend),
+        bargap=0,
         width=width,
         height=height,
         template=template,
@@ -215,7 +477,8 @@ def plot_oom_dist(
 
 def _create_comparison_figure(
     digits: np.ndarray,
-    occurrences: np.ndarray,
+    expected: np.ndarray,
+    observed: np.ndarray,
     trace_label: str,
     *,
     title: Optional[str] = None,
@@ -230,7 +493,8 @@ def _create_comparison_figure(
 
     Args:
         digits (np.ndarray): unique digits, to serve as data for x-axis.
-        occurrences (np.ndarray): number of times each digit occurred in dataset, to serve as data for y-axis.
+        expected (np.ndarray): probability of each digit according to Bendford's law.
+        observed (np.ndarray): observed probability of each digit in dataset.
         trace_label (str): the name/label of the trace.
         title (str, optional): title for the generated plot.
         subtitle(str, optional): subtitle for the generated plot.
@@ -246,7 +510,7 @@ def _create_comparison_figure(
     fig.add_trace(
         go.Scatter(
             x=digits,
-            y=bendford_dist(digits),
+            y=expected,
             name="Bendford's Law.",
             line=dict(color=color),
         )
@@ -254,7 +518,7 @@ def _create_comparison_figure(
     fig.add_trace(
         go.Scatter(
             x=digits,
-            y=occurrences / occurrences.sum(),
+            y=observed,
             name=trace_label,
             line=dict(color="MediumPurple"),
         )
@@ -305,14 +569,15 @@ def bendford_comparison_figure(
     Returns:
         plotly graphing objects figure
     """
-    digits, occurrences = digit_occurrences(sequence)
+    digits, _, total, expected, observed = _cached_benford_pipeline(sequence)
     subtitle: str = ""
     if display_count:
-        subtitle = f"N = {occurrences.sum()}."
+        subtitle = f"N = {total}."
 
     figure = _create_comparison_figure(
         digits,
-        occurrences,
+        expected,
+        observed,
         legend,
         title=title,
         subtitle=subtitle,
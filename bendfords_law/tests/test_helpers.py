@@ -1,6 +1,21 @@
+import timeit
+from collections import OrderedDict
+
 import numpy as np
+import pytest
 
-from ..helpers import digit_occurrences, fib_sequence, get_digits, int_to_digits
+from .. import helpers
+from ..helpers import (
+    bendford_comparison_figure,
+    bendford_dist_,
+    digit_occurrences,
+    fib_number,
+    fib_sequence,
+    get_digits,
+    int_to_digits,
+    nth_leading_digit,
+    plot_oom_dist,
+)
 
 
 def test_int_to_digits():
@@ -25,6 +40,38 @@ def test_get_first_digit():
         ), f"Digit mismatch {first_digit} != {true_first_digits[i_number]}."
 
 
+def test_get_digits():
+    """Tests that several digits are extracted at once, including from integers too large for int64."""
+    numbers_to_test = [8978, 10**20 + 7]
+    indices = [0, 1, -1]
+    true_digits = [[8, 9, 8], [1, 0, 7]]
+    for i_number, number in enumerate(numbers_to_test):
+        digits = get_digits(number, indices=indices)
+        assert (
+            digits == true_digits[i_number]
+        ), f"Digit mismatch {digits} != {true_digits[i_number]}."
+
+
+def test_nth_leading_digit():
+    """Tests that the digit at a given index is extracted from every number in a sequence."""
+    numbers_to_test = np.asarray([100, 505, 8978, 999999999999999999])
+    true_second_digits = np.asarray([0, 0, 9, 9])
+    second_digits = nth_leading_digit(numbers_to_test, k=1)
+    assert (
+        second_digits == true_second_digits
+    ).all(), f"Digit mismatch {second_digits} != {true_second_digits}."
+    with pytest.raises(ValueError):
+        nth_leading_digit(numbers_to_test, k=3)
+    with pytest.raises(ValueError):
+        nth_leading_digit(np.asarray([1.5, 20.0]))
+    uint64_numbers = np.asarray([2**64 - 1, 10**19, 57], dtype=np.uint64)
+    for k, true_digits in ((0, [1, 1, 5]), (1, [8, 0, 7]), (-1, [5, 0, 7])):
+        digits = nth_leading_digit(uint64_numbers, k=k)
+        assert (
+            digits == true_digits
+        ).all(), f"Digit mismatch {digits} != {true_digits}."
+
+
 def test_fib_sequence():
     """Test that Fibonacci sequences are correctly generated."""
     known_numbers = np.array([0, 1, 1, 2, 3, 5, 8, 13, 21, 34])
@@ -36,6 +83,41 @@ def test_fib_sequence():
     )
 
 
+def test_fib_sequence_exact():
+    """Test that Fibonacci numbers too large for float64 are generated exactly."""
+    seq = fib_sequence(n_elements=101)
+    assert (
+        seq[100] == 354224848179261915075
+    ), f"Fibonacci number mismatch. {seq[100]} != 354224848179261915075."
+
+
+def test_fib_sequence_uint64():
+    """Test that short Fibonacci sequences are stored as uint64, up to the largest Fibonacci number that fits."""
+    seq = fib_sequence(n_elements=94)
+    assert seq.dtype == np.uint64, f"Expected uint64 sequence, found {seq.dtype}."
+    assert (
+        int(seq[93]) == 12200160415121876738
+    ), f"Fibonacci number mismatch. {seq[93]} != 12200160415121876738."
+    _, occurrences = digit_occurrences(seq)
+    _, true_occurrences = digit_occurrences(seq.astype(object))
+    assert (
+        occurrences == true_occurrences
+    ).all(), f"Mismatch in uint64 and Python integer digit occurrences. {occurrences} != {true_occurrences}."
+
+
+def test_fib_large():
+    """Test that large Fibonacci numbers are computed exactly, without running into the recursion limit."""
+    number = fib_number(10_000)
+    assert (
+        number == fib_sequence(n_elements=10_001)[-1]
+    ), "Fast doubling and iterative Fibonacci numbers mismatch."
+    digits = str(number)
+    assert len(digits) == 2090, f"Expected 2090 digits, found {len(digits)}."
+    assert digits.startswith("33644764876431783266") and digits.endswith(
+        "9947366875"
+    ), f"Fibonacci number mismatch. {digits[:20]}...{digits[-10:]}."
+
+
 def test_digit_occurrences():
     """Tests that digit occurrences are correctly calculated."""
     numbers_to_test = np.arange(0, 10) * 100
@@ -48,3 +130,156 @@ def test_digit_occurrences():
     assert (
         occurrences == true_counts
     ).all(), f"Mismatch in obtained and expected digit occurrences. {occurrences} != {true_counts}."
+
+
+def test_digit_occurrences_include_zero():
+    """Tests that every digit gets a contiguous int64 count, including zero when it is not excluded."""
+    numbers_to_test = np.asarray([0, 7, 10, 75, 1000, 3])
+    true_counts = np.asarray([1, 2, 0, 1, 0, 0, 0, 2, 0, 0])
+    digits, occurrences = digit_occurrences(numbers_to_test, exclude_zero=False)
+    assert (
+        digits == np.arange(10)
+    ).all(), f"Mismatch in obtained and expected digits. {digits} != {np.arange(10)}."
+    assert (
+        occurrences == true_counts
+    ).all(), f"Mismatch in obtained and expected digit occurrences. {occurrences} != {true_counts}."
+    for array in (digits, occurrences):
+        assert array.dtype == np.int64, f"Expected int64 array, found {array.dtype}."
+        assert array.flags.c_contiguous, "Expected a contiguous array."
+
+
+def test_digit_occurrences_negative_index():
+    """Tests that negative digit indices count last digits, for int64 and Python integer sequences alike."""
+    numbers_to_test = [123, 45, 678, 9, 1000, 2]
+    true_counts = np.asarray([1, 0, 1, 1, 0, 1, 0, 0, 1, 1])
+    for sequence in (
+        np.asarray(numbers_to_test),
+        np.asarray(numbers_to_test, dtype=object),
+    ):
+        _, occurrences = digit_occurrences(sequence, digit_index=-1, exclude_zero=False)
+        assert (
+            occurrences == true_counts
+        ).all(), f"Mismatch in obtained and expected digit occurrences. {occurrences} != {true_counts}."
+    with pytest.raises(ValueError):
+        nth_leading_digit(np.asarray([10**18]), k=-20)
+    with pytest.raises(ValueError):
+        nth_leading_digit(np.asarray(numbers_to_test), k=-2)
+
+
+def test_leading_digit_counts_numba():
+    """Tests that the Numba leading digit kernel matches the NumPy leading digit extraction."""
+    numba = pytest.importorskip("numba")
+    from ..helpers import _leading_digit_counts
+
+    rng = np.random.default_rng(0)
+    sequences = [
+        rng.integers(0, np.iinfo(np.int64).max, size=100_000),
+        np.asarray([0, 0, 7, 10, 75, 1000, 3]),
+        np.asarray([], dtype=np.int64),
+    ]
+    for sequence in sequences:
+        counts = _leading_digit_counts(sequence, numba.get_num_threads())
+        true_counts = np.bincount(nth_leading_digit(sequence, 0), minlength=10)
+        assert (
+            counts == true_counts
+        ).all(), f"Mismatch in Numba and NumPy leading digit counts. {counts} != {true_counts}."
+
+
+def test_bendford_dist_():
+    """Tests that Bendford's law distributions are valid and cached distributions can't be modified."""
+    for order in [1, 2, 3]:
+        distribution = bendford_dist_(order)
+        assert np.isclose(
+            distribution.sum(), 1.0
+        ), f"Distribution of order {order} does not sum to 1. {distribution.sum()} != 1."
+        assert distribution is bendford_dist_(
+            order
+        ), f"Distribution of order {order} was recomputed instead of cached."
+        assert not distribution.flags.writeable, "Cached distribution is writeable."
+
+
+def test_digit_occurrences_non_integer():
+    """Tests that sequences of non-integers, negative numbers or numbers with too few digits are rejected, including
+    Python object sequences."""
+    with pytest.raises(ValueError):
+        digit_occurrences(np.asarray([1.5, 20.0, 300.0]))
+    for sequence in ([5, 1.5, 10**20], ["123", 10**20], [-5, 10**20]):
+        with pytest.raises(ValueError):
+            digit_occurrences(np.asarray(sequence, dtype=object))
+    for sequence in ([5, 12], [5, 10**20]):
+        with pytest.raises(ValueError):
+            digit_occurrences(np.asarray(sequence, dtype=object), digit_index=3)
+
+
+def test_plot_oom_dist():
+    """Tests that orders of magnitude are binned before plotting, including zeros and Python integers."""
+    fib_numbers = fib_sequence(n_elements=101)
+    fib_orders, fib_counts = np.unique(
+        [len(str(number)) - 1 for number in fib_numbers[1:]], return_counts=True
+    )
+    sequences_to_test = [
+        (np.asarray([0, 5, 7, 50, 500]), [-5, 0, 1, 2], [1, 2, 1, 1]),
+        (np.asarray([1, 9, 10, 99, 1000]), [0, 1, 3], [2, 2, 1]),
+        (fib_numbers, [-5, *fib_orders], [1, *fib_counts]),
+    ]
+    for sequence, true_orders, true_counts in sequences_to_test:
+        figure = plot_oom_dist(sequence, "sequence")
+        orders, counts = figure.data[0].x, figure.data[0].y
+        assert (
+            orders == np.asarray(true_orders)
+        ).all(), f"Mismatch in obtained and expected orders of magnitude. {orders} != {true_orders}."
+        assert (
+            counts == np.asarray(true_counts)
+        ).all(), f"Mismatch in obtained and expected counts. {counts} != {true_counts}."
+
+
+def test_bendford_comparison_figure_cache(monkeypatch):
+    """Tests that re-rendered figures reuse digit occurrences, unless the sequence was modified in between."""
+    n_calls = 0
+    benford_pipeline = helpers._benford_pipeline
+
+    def counting_benford_pipeline(sequence):
+        nonlocal n_calls
+        n_calls += 1
+        return benford_pipeline(sequence)
+
+    # the cache is only used when digits are counted without Numba
+    monkeypatch.setattr(helpers, "_leading_digit_counts", None)
+    monkeypatch.setattr(helpers, "_PIPELINE_CACHE", OrderedDict())
+    monkeypatch.setattr(helpers, "_benford_pipeline", counting_benford_pipeline)
+
+    sequence = np.arange(1, 10) * 100
+    figure = bendford_comparison_figure(sequence, "sequence")
+    restyled_figure = bendford_comparison_figure(sequence, "sequence", width=500)
+    assert n_calls == 1, f"Digits were counted {n_calls} times instead of once."
+    assert (
+        figure.data[1].y == restyled_figure.data[1].y
+    ).all(), "Mismatch in observed distributions of the same sequence."
+
+    sequence[1:] = 100
+    modified_figure = bendford_comparison_figure(sequence, "sequence")
+    assert (
+        modified_figure.data[1].y[0] == 1.0
+    ), f"Observed distribution was not recomputed. {modified_figure.data[1].y[0]} != 1.0."
+    assert n_calls == 2, f"Expected digits to be counted twice, found {n_calls}."
+
+
+def test_bendford_comparison_figure_cache_speed(monkeypatch):
+    """Tests that reusing the digit occurrences of a large sequence is faster than recounting them."""
+    monkeypatch.setattr(helpers, "_leading_digit_counts", None)
+    monkeypatch.setattr(helpers, "_PIPELINE_CACHE", OrderedDict())
+    sequence = np.random.default_rng(0).integers(
+        0, np.iinfo(np.int64).max, size=2_000_000
+    )
+    helpers._cached_benford_pipeline(sequence)
+    cached_time = min(
+        timeit.repeat(
+            lambda: helpers._cached_benford_pipeline(sequence), number=1, repeat=5
+        )
+    )
+    recount_time = min(
+        timeit.repeat(lambda: helpers._benford_pipeline(sequence), number=1, repeat=5)
+    )
+    assert (
+        cached_time < recount_time
+    ), f"Cached digit occurrences were not faster than recounting. {cached_time:.4f}s >= {recount_time:.4f}s."